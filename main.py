@@ -11,21 +11,20 @@
 # 导入模块
 # ============================================================
 
-# 标准库
+# 标准库 (仅导入轻量模块，smtplib / email 在发送邮件时再导入)
 import json
 import logging
 import os
-import smtplib
+import random
+import re
+import sys
 import time
-from datetime import datetime
-from email.mime.multipart import MIMEMultipart
-from email.mime.text import MIMEText
-from typing import Optional
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Optional
 
-# 第三方库
-import feedparser
-import requests
-from openai import OpenAI
+# 第三方库 (feedparser / requests / openai / google.generativeai) 均在
+# 对应阶段的函数内部按需导入。没有新文章时任务会在 filter_new_articles
+# 之后直接结束，无需为 AI 和推送相关的 SDK 付出数百毫秒的导入开销。
 
 # ============================================================
 # 配置区域
@@ -78,10 +77,83 @@ RSS_SOURCES = [
     },
 ]
 
+# --- 相关性预筛选配置 ---
+# 在调用 AI 之前用关键词对新文章打分排序，去掉宽泛检索带来的离题结果。
+# 每个关键词在标题中命中计 权重×2 分，在摘要中命中计 权重 分 (只按是否出现计分)。
+# 可通过环境变量 RELEVANCE_KEYWORDS 覆盖，格式: "term:weight,term2:weight2"
+DEFAULT_RELEVANCE_KEYWORDS = {
+    "juvenile dermatomyositis": 5,
+    "dermatomyositis": 3,
+    "JDM": 3,
+    "myositis": 2,
+    "inflammatory myopath": 2,
+    "MDA5": 2,
+    "NXP2": 2,
+    "TIF1": 2,
+    "calcinosis": 2,
+    "JAK inhibitor": 2,
+    "tofacitinib": 2,
+    "baricitinib": 2,
+    "ruxolitinib": 2,
+    "interferon": 1,
+    "intravenous immunoglobulin": 1,
+    "IVIG": 1,
+    "rituximab": 1,
+    "interstitial lung disease": 1,
+    "juvenile": 1,
+    "pediatric": 1,
+    "paediatric": 1,
+    "child": 1,
+    "rheumat": 1,
+}
+RELEVANCE_KEYWORDS = os.environ.get("RELEVANCE_KEYWORDS", "")
+# 低于该分数的文章不送入 AI (设为 0 关闭过滤)
+RELEVANCE_MIN_SCORE = float(os.environ.get("RELEVANCE_MIN_SCORE") or "3")
+# 每期日报最多送入 AI 的文章数 (设为 0 不限制)
+MAX_ARTICLES_PER_DIGEST = int(os.environ.get("MAX_ARTICLES_PER_DIGEST") or "20")
+
 # --- 历史记录配置 ---
 HISTORY_FILE = "history.json"
 MAX_HISTORY_SIZE = 1000  # 最大历史记录数量，防止文件无限增大
 
+# --- RSS 缓存验证配置 ---
+# 记录每个 RSS 源上次响应的 ETag / Last-Modified，用于条件请求 (HTTP 304)
+FEED_STATE_FILE = "feed_state.json"
+
+# --- 运行检查点配置 ---
+# 记录本次运行已完成的阶段 (fetched → summarized → delivered)，进程中断后
+# 下次运行从断点继续，避免重复调用 AI 和重复推送
+RUN_JOURNAL_FILE = "run_journal.json"
+
+# --- 归档配置 ---
+# 每期日报的文献与 AI 总结写入本地 SQLite 数据库 (FTS5 全文索引)，
+# 可通过 `python main.py search <关键词>` 检索
+ARCHIVE_DB = os.environ.get("ARCHIVE_DB", "archive.db")
+
+# --- 周报 / 月报配置 ---
+# 周报和月报由归档中已有的每日总结合并而成，不再重新总结原始摘要
+ROLLUP_BATCH_SIZE = int(os.environ.get("ROLLUP_BATCH_SIZE") or "7")  # 每次 AI 调用最多合并的总结数
+ROLLUP_ITEM_CHARS = int(os.environ.get("ROLLUP_ITEM_CHARS") or "2000")  # 每条输入总结的最大字符数
+
+# --- 网络调用容错配置 (重试 / 退避 / 熔断) ---
+# 每类外部调用的单次超时 (timeout) 与含重试在内的总时间预算 (budget)，单位秒
+RESILIENCE_POLICIES = {
+    "feed": {"timeout": 20, "budget": 45},
+    "llm": {"timeout": 300, "budget": 360},  # 单次需容纳 max_tokens=4096 的完整生成
+    "telegram": {"timeout": 15, "budget": 40},
+    "smtp": {"timeout": 30, "budget": 90},
+}
+RETRY_MAX_ATTEMPTS = int(os.environ.get("RETRY_MAX_ATTEMPTS") or "3")
+RETRY_BASE_DELAY = 1.0  # 指数退避的初始等待时间 (秒)
+RETRY_MAX_DELAY = 20.0  # 单次退避的最长等待时间 (秒)
+# 整次运行的时间上限 (秒)，所有外部调用的预算都不会超过剩余时间
+RUN_DEADLINE = int(os.environ.get("RUN_DEADLINE") or "900")
+# 连续失败达到阈值后熔断；冷却期内直接失败，冷却后只放行一次短超时的探测请求
+CIRCUIT_FAILURE_THRESHOLD = 3
+CIRCUIT_COOLDOWN = 3600
+CIRCUIT_PROBE_TIMEOUT = 5
+CIRCUIT_STATE_FILE = "circuit_state.json"
+
 # --- 日志配置 ---
 logging.basicConfig(
     level=logging.INFO,
@@ -95,6 +167,22 @@ logger = logging.getLogger(__name__)
 # 历史记录管理
 # ============================================================
 
+def write_json_atomic(path: str, data) -> None:
+    """
+    原子写入 JSON 文件：先写入临时文件再替换，进程中断时不会留下半截文件。
+
+    Args:
+        path: 目标文件路径
+        data: 可序列化为 JSON 的数据
+    """
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
 def load_history() -> set:
     """
     加载历史记录文件。
@@ -128,29 +216,405 @@ def save_history(history: set) -> None:
         history_list = history_list[-MAX_HISTORY_SIZE:]
 
     try:
-        with open(HISTORY_FILE, "w", encoding="utf-8") as f:
-            json.dump(history_list, f, ensure_ascii=False, indent=2)
+        write_json_atomic(HISTORY_FILE, history_list)
         logger.info(f"已保存 {len(history_list)} 条历史记录")
     except IOError as e:
         logger.error(f"保存历史记录失败: {e}")
 
 
+def load_feed_state() -> dict:
+    """
+    加载 RSS 源的缓存验证信息 (ETag / Last-Modified)。
+
+    Returns:
+        以 RSS URL 为键的验证信息字典
+    """
+    if os.path.exists(FEED_STATE_FILE):
+        try:
+            with open(FEED_STATE_FILE, "r", encoding="utf-8") as f:
+                data = json.load(f)
+                if isinstance(data, dict):
+                    return data
+        except (json.JSONDecodeError, IOError) as e:
+            logger.warning(f"读取 RSS 缓存验证信息失败: {e}，将重新完整获取")
+    return {}
+
+
+def save_feed_state(feed_state: dict) -> None:
+    """
+    保存 RSS 源的缓存验证信息。
+
+    Args:
+        feed_state: 以 RSS URL 为键的验证信息字典
+    """
+    try:
+        write_json_atomic(FEED_STATE_FILE, feed_state)
+    except IOError as e:
+        logger.error(f"保存 RSS 缓存验证信息失败: {e}")
+
+
+# ============================================================
+# 运行检查点
+# ============================================================
+
+def load_run_journal() -> Optional[dict]:
+    """
+    加载上次未完成运行的检查点。
+
+    Returns:
+        检查点字典，不存在或无法读取时返回 None
+    """
+    if not os.path.exists(RUN_JOURNAL_FILE):
+        return None
+
+    try:
+        with open(RUN_JOURNAL_FILE, "r", encoding="utf-8") as f:
+            journal = json.load(f)
+    except (json.JSONDecodeError, IOError) as e:
+        logger.warning(f"读取运行检查点失败: {e}，将重新开始")
+        return None
+
+    if not is_valid_run_journal(journal):
+        # 无效的检查点无法续跑，删除后重新开始，避免每次运行都在同一处出错
+        logger.warning("运行检查点内容无效，已丢弃并重新开始")
+        clear_run_journal()
+        return None
+
+    return journal
+
+
+def is_valid_run_journal(journal) -> bool:
+    """
+    检查运行检查点是否包含续跑所需的全部字段。
+
+    Args:
+        journal: 从文件读取的检查点
+
+    Returns:
+        是否可以用于续跑
+    """
+    if not isinstance(journal, dict):
+        return False
+    if not isinstance(journal.get("run_id"), str):
+        return False
+    if journal.get("stage") not in ("fetched", "summarized", "delivered"):
+        return False
+    if not isinstance(journal.get("new_articles"), list) or not journal["new_articles"]:
+        return False
+    if not all(isinstance(a, dict) and a.get("id") for a in journal["new_articles"]):
+        return False
+
+    delivered = journal.get("delivered")
+    if not isinstance(delivered, dict):
+        return False
+    if not isinstance(delivered.get("telegram"), list) or not isinstance(delivered.get("email"), bool):
+        return False
+
+    # 总结完成后的阶段必须带有待推送的消息
+    if journal["stage"] != "fetched":
+        if not isinstance(journal.get("message"), str) or not isinstance(journal.get("fallback"), bool):
+            return False
+
+    return True
+
+
+def save_run_journal(journal: dict) -> None:
+    """
+    原子写入运行检查点。
+
+    Args:
+        journal: 检查点字典
+    """
+    try:
+        write_json_atomic(RUN_JOURNAL_FILE, journal)
+        logger.info(f"检查点已更新: {journal.get('stage')}")
+    except IOError as e:
+        logger.error(f"保存运行检查点失败: {e}")
+
+
+def clear_run_journal() -> None:
+    """运行完成后删除检查点"""
+    try:
+        if os.path.exists(RUN_JOURNAL_FILE):
+            os.remove(RUN_JOURNAL_FILE)
+    except OSError as e:
+        logger.error(f"删除运行检查点失败: {e}")
+
+
+# ============================================================
+# 网络调用容错 (重试 / 退避 / 熔断)
+# ============================================================
+
+_RUN_STARTED_AT = time.monotonic()
+_circuit_state: Optional[dict] = None
+
+
+class CircuitOpenError(Exception):
+    """端点处于熔断状态，调用被直接拒绝"""
+
+
+class DeadlineExceededError(Exception):
+    """端点时间预算或整次运行的时间上限已用完"""
+
+
+class DeliveryUncertainError(Exception):
+    """
+    非幂等的请求 (Telegram 消息、邮件、按量计费的 AI 调用) 已发出但未收到确认，
+    可能已经送达或已经计费。这类错误不能重试，否则会重复推送或重复付费。
+    """
+
+
+def load_circuit_state() -> dict:
+    """
+    加载各端点的熔断状态 (跨运行保存，已失效的端点在下次运行时也能快速失败)。
+
+    Returns:
+        以端点名为键的状态字典: {"failures": 连续失败次数, "opened_at": 熔断时间戳}
+    """
+    global _circuit_state
+    if _circuit_state is None:
+        _circuit_state = {}
+        if os.path.exists(CIRCUIT_STATE_FILE):
+            try:
+                with open(CIRCUIT_STATE_FILE, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                    if isinstance(data, dict):
+                        _circuit_state = data
+            except (json.JSONDecodeError, IOError) as e:
+                logger.warning(f"读取熔断状态失败: {e}，将重置所有端点")
+    return _circuit_state
+
+
+def save_circuit_state() -> None:
+    """保存各端点的熔断状态"""
+    try:
+        write_json_atomic(CIRCUIT_STATE_FILE, load_circuit_state())
+    except IOError as e:
+        logger.error(f"保存熔断状态失败: {e}")
+
+
+def get_status_code(exc: Exception) -> Optional[int]:
+    """
+    提取异常携带的 HTTP 状态码 (requests.HTTPError / openai.APIStatusError /
+    google.api_core 异常)。
+
+    Returns:
+        状态码，异常不含状态码时返回 None
+    """
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    if status is None and isinstance(getattr(exc, "code", None), int):
+        status = exc.code
+    return status if isinstance(status, int) else None
+
+
+def is_retryable(exc: Exception) -> bool:
+    """
+    判断异常是否值得重试。只有真正的传输层故障才重试：网络异常与超时
+    (OSError 及 requests / openai 的连接、超时异常)、5xx、408、429 和 SMTP 4xx。
+    其他 4xx、SMTP 5xx 以及无法识别的异常 (如 SDK 抛出的 TypeError / ValueError)
+    直接失败，也不计入熔断。
+
+    Args:
+        exc: 调用抛出的异常
+
+    Returns:
+        是否可以重试
+    """
+    if isinstance(exc, (CircuitOpenError, DeadlineExceededError, DeliveryUncertainError)):
+        return False
+
+    # 只检查已经导入的 SDK，避免为了判断异常类型而加载重量级模块
+    smtplib = sys.modules.get("smtplib")
+    if smtplib is not None and isinstance(exc, smtplib.SMTPException):
+        if isinstance(exc, smtplib.SMTPRecipientsRefused):
+            # 所有收件人都以 4xx 拒绝时才是临时故障
+            codes = [code for code, _ in exc.recipients.values()]
+            return bool(codes) and all(400 <= code < 500 for code in codes)
+        if isinstance(exc, smtplib.SMTPResponseException):
+            # 如认证失败 535 为永久错误，421 / 451 等为临时错误
+            return 400 <= exc.smtp_code < 500
+        return isinstance(exc, smtplib.SMTPServerDisconnected)
+
+    status = get_status_code(exc)
+    if status is not None:
+        return status >= 500 or status in (408, 429)
+
+    requests = sys.modules.get("requests")
+    if requests is not None and isinstance(exc, requests.exceptions.RequestException):
+        # InvalidURL / MissingSchema 等同样继承自 RequestException，不应重试
+        return isinstance(exc, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+    openai = sys.modules.get("openai")
+    if openai is not None and isinstance(exc, openai.APIConnectionError):
+        # 包含 APITimeoutError
+        return True
+
+    # socket 错误、TimeoutError、ConnectionError、SSL 错误等
+    return isinstance(exc, OSError)
+
+
+def is_connect_failure(exc: Exception) -> bool:
+    """
+    判断异常是否发生在建立连接阶段 (DNS 失败、连接被拒、连接超时)，
+    即请求肯定没有发出。读超时、连接中途断开等情况返回 False。
+
+    Args:
+        exc: requests 或 openai 抛出的异常
+
+    Returns:
+        请求是否肯定未发出
+    """
+    requests = sys.modules.get("requests")
+    if requests is not None:
+        from urllib3.exceptions import NewConnectionError
+
+        if isinstance(exc, requests.exceptions.ConnectTimeout):
+            return True
+        if isinstance(exc, requests.exceptions.ConnectionError) and exc.args:
+            # 连接阶段失败时 requests 包装的是 MaxRetryError(reason=NewConnectionError)
+            return isinstance(getattr(exc.args[0], "reason", None), NewConnectionError)
+
+    openai = sys.modules.get("openai")
+    if openai is not None and isinstance(exc, openai.APIConnectionError):
+        # openai 把底层 HTTP 库的异常作为 __cause__ 保留；按类名判断，
+        # 不依赖具体的 HTTP 库版本
+        return type(exc.__cause__).__name__ in ("ConnectError", "ConnectTimeout")
+
+    return False
+
+
+def call_with_resilience(endpoint: str, func: Callable[[float], Any]) -> Any:
+    """
+    带重试、抖动指数退避、时间预算和熔断的外部调用。
+
+    端点名形如 "feed:pubmed.ncbi.nlm.nih.gov"、"llm:deepseek"、"telegram"、"smtp"，
+    冒号前的部分决定使用 RESILIENCE_POLICIES 中的哪套超时和预算。
+
+    Args:
+        endpoint: 端点名，熔断状态按端点分别记录
+        func: 实际发起调用的函数，参数为本次尝试可用的超时秒数
+
+    Returns:
+        func 的返回值
+
+    Raises:
+        CircuitOpenError: 端点处于熔断冷却期
+        DeadlineExceededError: 预算用完仍未成功且没有可抛出的原始异常
+        Exception: 最后一次尝试抛出的原始异常
+    """
+    policy = RESILIENCE_POLICIES[endpoint.split(":")[0]]
+    circuits = load_circuit_state()
+    circuit = circuits.get(endpoint, {"failures": 0, "opened_at": 0})
+
+    max_attempts = RETRY_MAX_ATTEMPTS
+    timeout = policy["timeout"]
+
+    if circuit["failures"] >= CIRCUIT_FAILURE_THRESHOLD:
+        if time.time() - circuit["opened_at"] < CIRCUIT_COOLDOWN:
+            raise CircuitOpenError(f"{endpoint} 已熔断，跳过调用")
+        # 冷却期已过: 半开状态，只放行一次短超时的探测请求
+        logger.info(f"{endpoint} 熔断冷却结束，发起探测请求")
+        max_attempts = 1
+        timeout = min(timeout, CIRCUIT_PROBE_TIMEOUT)
+
+    run_remaining = RUN_DEADLINE - (time.monotonic() - _RUN_STARTED_AT)
+    deadline = time.monotonic() + min(policy["budget"], run_remaining)
+
+    last_error: Optional[Exception] = None
+    for attempt in range(max_attempts):
+        remaining = deadline - time.monotonic()
+        if remaining < 1:
+            break
+
+        try:
+            result = func(min(timeout, remaining))
+        except Exception as e:
+            last_error = e
+            if not is_retryable(e):
+                # 永久性错误说明端点本身可达，不计入熔断
+                raise
+            logger.warning(f"{endpoint} 第 {attempt + 1}/{max_attempts} 次调用失败: {e}")
+        else:
+            if circuit["failures"]:
+                circuits.pop(endpoint, None)
+                save_circuit_state()
+            return result
+
+        if attempt + 1 < max_attempts:
+            # 全抖动指数退避，且退避后至少还要留出 1 秒给下一次尝试
+            delay = random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+            delay = min(delay, deadline - time.monotonic() - 1)
+            if delay > 0:
+                time.sleep(delay)
+
+    # 预算或运行时间已用完、一次都没有尝试时，不能说明端点有问题，不计入熔断
+    if last_error is None:
+        raise DeadlineExceededError(f"{endpoint} 时间预算已用完，未发起调用")
+
+    circuit["failures"] += 1
+    if circuit["failures"] >= CIRCUIT_FAILURE_THRESHOLD:
+        circuit["opened_at"] = time.time()
+        logger.error(f"{endpoint} 连续失败 {circuit['failures']} 次，熔断 {CIRCUIT_COOLDOWN} 秒")
+    circuits[endpoint] = circuit
+    save_circuit_state()
+
+    raise last_error
+
+
+def call_llm_with_resilience(endpoint: str, func: Callable[[float], Any]) -> Any:
+    """
+    AI 生成调用的容错封装。生成请求按量计费，请求发出后的读超时或断连
+    可能已经产生费用，因此只重试连接失败和服务端返回的 5xx / 429。
+
+    Args:
+        endpoint: 端点名，如 "llm:deepseek"
+        func: 实际发起调用的函数，参数为本次尝试可用的超时秒数
+
+    Returns:
+        func 的返回值
+    """
+    def attempt(timeout: float):
+        try:
+            return func(timeout)
+        except Exception as e:
+            api_exceptions = sys.modules.get("google.api_core.exceptions")
+            # Gemini 的客户端超时以 504 DeadlineExceeded 的形式抛出
+            timed_out = api_exceptions is not None and isinstance(e, api_exceptions.DeadlineExceeded)
+            if timed_out or (
+                is_retryable(e) and get_status_code(e) is None and not is_connect_failure(e)
+            ):
+                raise DeliveryUncertainError(f"AI 请求已发出但未收到响应: {e}") from e
+            raise
+
+    return call_with_resilience(endpoint, attempt)
+
+
 # ============================================================
 # RSS 解析
 # ============================================================
 
-def fetch_rss_articles(sources: list) -> list:
+def fetch_rss_articles(sources: list, feed_state: Optional[dict] = None) -> list:
     """
     从 RSS 源获取文章列表，包含反爬虫策略。
 
+    传入 feed_state 时会携带 If-None-Match / If-Modified-Since 发起条件请求，
+    源未更新 (HTTP 304) 时直接跳过解析，并把新的验证信息写回 feed_state。
+
     Args:
         sources: RSS 源配置列表
+        feed_state: RSS 缓存验证信息 (可选，会被原地更新)
 
     Returns:
         文章列表，每篇包含 id, title, link, summary, source, published
     """
+    import requests
+    from urllib.parse import urlparse
+
     articles = []
     session = requests.Session()
+    first_request = True
 
     for source in sources:
         source_name = source.get("name", "Unknown")
@@ -175,12 +639,43 @@ def fetch_rss_articles(sources: list) -> list:
                 "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
             }
 
+        # 条件请求: 源未更新时服务器返回 304，省去下载与解析
+        validators = (feed_state or {}).get(url, {})
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+
         try:
-            # 延时避免封禁
-            time.sleep(2)
-            response = session.get(url, headers=headers, timeout=30)
-            response.raise_for_status()
+            # 请求间延时避免封禁
+            if not first_request:
+                time.sleep(2)
+            first_request = False
+
+            def fetch(timeout: float):
+                resp = session.get(url, headers=headers, timeout=timeout)
+                if resp.status_code != 304:
+                    resp.raise_for_status()
+                return resp
+
+            response = call_with_resilience(f"feed:{urlparse(url).hostname}", fetch)
+
+            if response.status_code == 304:
+                logger.info(f"'{source_name}' 自上次运行后未更新 (304)，跳过")
+                continue
+
+            if feed_state is not None:
+                new_validators = {}
+                if response.headers.get("ETag"):
+                    new_validators["etag"] = response.headers["ETag"]
+                if response.headers.get("Last-Modified"):
+                    new_validators["last_modified"] = response.headers["Last-Modified"]
+                if new_validators:
+                    feed_state[url] = new_validators
+                else:
+                    feed_state.pop(url, None)
 
+            import feedparser
             feed = feedparser.parse(response.content)
 
             current_count = 0
@@ -224,6 +719,111 @@ def filter_new_articles(articles: list, history: set) -> list:
     return new_articles
 
 
+# ============================================================
+# 相关性预筛选
+# ============================================================
+
+def load_relevance_keywords() -> dict:
+    """
+    读取相关性关键词及权重，未配置 RELEVANCE_KEYWORDS 时使用默认词表。
+
+    Returns:
+        关键词到权重的字典
+    """
+    if not RELEVANCE_KEYWORDS:
+        return DEFAULT_RELEVANCE_KEYWORDS
+
+    keywords = {}
+    for item in RELEVANCE_KEYWORDS.split(","):
+        item = item.strip()
+        if not item:
+            continue
+
+        term, sep, weight = item.rpartition(":")
+        if not sep:
+            # 未写权重时整项作为关键词，权重为 1
+            term, weight = item, "1"
+        term = term.strip()
+
+        try:
+            weight = float(weight)
+        except ValueError:
+            weight = 0
+        # 空关键词会匹配所有文章，非正权重没有意义，均忽略
+        if not term or weight <= 0:
+            logger.warning(f"忽略无效的相关性关键词配置: {item}")
+            continue
+
+        keywords[term] = weight
+
+    if not keywords:
+        logger.warning("RELEVANCE_KEYWORDS 中没有有效的关键词，使用默认词表")
+        return DEFAULT_RELEVANCE_KEYWORDS
+    return keywords
+
+
+def score_article(article: dict, patterns: list) -> float:
+    """
+    计算文章的相关性得分。
+
+    Args:
+        article: 文章字典
+        patterns: (正则, 权重) 列表
+
+    Returns:
+        相关性得分
+    """
+    title = article.get("title", "")
+    summary = article.get("summary", "")
+
+    score = 0.0
+    for pattern, weight in patterns:
+        if pattern.search(title):
+            score += weight * 2
+        if pattern.search(summary):
+            score += weight
+    return score
+
+
+def rank_articles(articles: list) -> tuple:
+    """
+    按相关性得分排序新文章，丢弃低于阈值的文章并截断到每期上限。
+
+    超出每期上限的文章是相关的，只是本期放不下：它们不应记入历史，
+    下次运行时会重新参与排序。
+
+    Args:
+        articles: 新文章列表
+
+    Returns:
+        (送入 AI 的文章列表 (按得分从高到低), 因超出上限顺延到下次的文章列表)
+    """
+    # 只匹配词首，使 "myopath" 同时命中 myopathy / myopathies
+    patterns = [
+        (re.compile(r"\b" + re.escape(term), re.IGNORECASE), weight)
+        for term, weight in load_relevance_keywords().items()
+    ]
+
+    scored = [(score_article(a, patterns), a) for a in articles]
+    # 稳定排序: 同分文章保持 RSS 源中的原始顺序
+    scored.sort(key=lambda x: x[0], reverse=True)
+
+    selected = [a for score, a in scored if score >= RELEVANCE_MIN_SCORE]
+    dropped = len(scored) - len(selected)
+    deferred = []
+
+    if MAX_ARTICLES_PER_DIGEST > 0 and len(selected) > MAX_ARTICLES_PER_DIGEST:
+        deferred = selected[MAX_ARTICLES_PER_DIGEST:]
+        selected = selected[:MAX_ARTICLES_PER_DIGEST]
+        for a in deferred:
+            logger.info(f"超出每期上限，顺延到下次: {a.get('title', '')}")
+
+    logger.info(
+        f"相关性预筛选: 保留 {len(selected)} 篇，丢弃 {dropped} 篇，顺延 {len(deferred)} 篇"
+    )
+    return selected, deferred
+
+
 # ============================================================
 # AI 总结 (多模型支持 + 多语言支持)
 # ============================================================
@@ -323,14 +923,22 @@ def generate_with_gemini(prompt: str) -> Optional[str]:
         import google.generativeai as genai
         genai.configure(api_key=GEMINI_API_KEY)
 
-        logger.info("正在自动选择最佳 Gemini 模型...")
         available_models = []
-        try:
-            for m in genai.list_models():
-                if "generateContent" in m.supported_generation_methods:
-                    available_models.append(m.name)
-        except Exception as e:
-            logger.warning(f"无法列出模型，尝试使用默认值: {e}")
+        # 已指定模型时无需列出模型，省去一次网络请求
+        if not AI_MODEL_NAME:
+            logger.info("正在自动选择最佳 Gemini 模型...")
+            try:
+                # 列出模型不计费且幂等，可按普通调用重试；list() 确保分页请求都在超时内完成
+                available_models = call_with_resilience(
+                    "llm:gemini",
+                    lambda timeout: [
+                        m.name
+                        for m in list(genai.list_models(request_options={"timeout": timeout}))
+                        if "generateContent" in m.supported_generation_methods
+                    ],
+                )
+            except Exception as e:
+                logger.warning(f"无法列出模型，尝试使用默认值: {e}")
 
         # 确定模型名称
         model_name = AI_MODEL_NAME if AI_MODEL_NAME else "models/gemini-pro"
@@ -348,7 +956,10 @@ def generate_with_gemini(prompt: str) -> Optional[str]:
         logger.info(f"已选择 Gemini 模型: {model_name}")
         model = genai.GenerativeModel(model_name)
 
-        response = model.generate_content(prompt)
+        response = call_llm_with_resilience(
+            "llm:gemini",
+            lambda timeout: model.generate_content(prompt, request_options={"timeout": timeout}),
+        )
         if response and response.text:
             logger.info("Gemini 总结生成成功")
             return response.text
@@ -415,16 +1026,22 @@ def generate_with_openai_compatible(prompt: str, provider: str) -> Optional[str]
         system_content = "你是一个专业的风湿免疫科医学文献助手。"
 
     try:
-        client = OpenAI(api_key=api_key, base_url=base_url)
-
-        response = client.chat.completions.create(
-            model=model_name,
-            messages=[
-                {"role": "system", "content": system_content},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.7,
-            max_tokens=4096,
+        from openai import OpenAI
+        # 关闭 SDK 自带的重试，统一由 call_with_resilience 控制
+        client = OpenAI(api_key=api_key, base_url=base_url, max_retries=0)
+
+        response = call_llm_with_resilience(
+            f"llm:{provider}",
+            lambda timeout: client.chat.completions.create(
+                model=model_name,
+                messages=[
+                    {"role": "system", "content": system_content},
+                    {"role": "user", "content": prompt},
+                ],
+                temperature=0.7,
+                max_tokens=4096,
+                timeout=timeout,
+            ),
         )
 
         if response and response.choices and response.choices[0].message:
@@ -458,7 +1075,19 @@ def generate_ai_summary(articles: list) -> Optional[str]:
         logger.info("没有新文章，无需 AI 总结")
         return None
 
-    prompt = build_prompt(articles)
+    return generate_text(build_prompt(articles))
+
+
+def generate_text(prompt: str) -> Optional[str]:
+    """
+    按 AI_PROVIDER 配置把 Prompt 发送给对应的 AI 服务。
+
+    Args:
+        prompt: 提示词
+
+    Returns:
+        生成的文本，失败返回 None
+    """
     logger.info(f"当前 AI 提供商: {AI_PROVIDER.upper()}, 语言: {SUMMARY_LANGUAGE}")
 
     if AI_PROVIDER == "gemini":
@@ -512,12 +1141,21 @@ def escape_markdown(text: str) -> str:
     return "".join(result)
 
 
-def send_telegram_message(text: str) -> bool:
+def send_telegram_message(
+    text: str,
+    sent_parts: Optional[set] = None,
+    on_part_sent: Optional[Callable[[int], None]] = None,
+) -> bool:
     """
     发送消息到 Telegram，失败时自动降级为纯文本。
 
+    长消息会被切分为多段 (从 1 开始编号)。同一文本的切分结果是确定的，
+    因此可以通过 sent_parts 跳过之前已发出的分段。
+
     Args:
         text: 消息文本
+        sent_parts: 已发送成功的分段编号，这些分段不再重发 (可选)
+        on_part_sent: 每段发送成功后的回调，参数为分段编号 (可选)
 
     Returns:
         是否全部发送成功
@@ -526,6 +1164,8 @@ def send_telegram_message(text: str) -> bool:
         logger.error("未配置 TELEGRAM_BOT_TOKEN 或 TELEGRAM_CHAT_ID")
         return False
 
+    import requests
+
     # 清理 AI 可能生成的多余前缀
     original_text = text.strip()
     lines = original_text.split('\n')
@@ -582,9 +1222,31 @@ def send_telegram_message(text: str) -> bool:
             messages.append(remaining)
             remaining = ""
 
+    def post(payload: dict):
+        """
+        发送一条消息；只有确定消息未发出时才重试 (连接失败、5xx / 429)，
+        请求发出后的读超时或断连抛出 DeliveryUncertainError，不再重发。
+        """
+        def _post(timeout: float):
+            try:
+                resp = requests.post(url, json=payload, timeout=timeout)
+            except requests.exceptions.RequestException as e:
+                if is_connect_failure(e):
+                    raise
+                raise DeliveryUncertainError(f"请求已发出但未收到响应: {e}") from e
+            if resp.status_code >= 500 or resp.status_code == 429:
+                resp.raise_for_status()
+            return resp
+        return call_with_resilience("telegram", _post)
+
     all_success = True
+    sent_parts = sent_parts or set()
 
     for i, msg in enumerate(messages, 1):
+        if i in sent_parts:
+            logger.info(f"消息 {i}/{len(messages)} 已在之前的运行中发送，跳过")
+            continue
+
         # 方案 A: 尝试 Markdown 发送
         escaped_msg = escape_markdown(msg)
         payload = {
@@ -595,12 +1257,19 @@ def send_telegram_message(text: str) -> bool:
         }
 
         try:
-            resp = requests.post(url, json=payload, timeout=30)
+            resp = post(payload)
             if resp.status_code == 200:
                 logger.info(f"消息 {i}/{len(messages)} (Markdown) 发送成功")
+                if on_part_sent:
+                    on_part_sent(i)
                 continue
             else:
                 logger.warning(f"消息 {i} Markdown 发送失败 ({resp.text})，尝试纯文本重发...")
+        except DeliveryUncertainError as e:
+            # 可能已经送达，降级重发会导致重复消息
+            logger.error(f"消息 {i} 可能已送达但未确认，不再重发: {e}")
+            all_success = False
+            continue
         except Exception as e:
             logger.warning(f"消息 {i} 网络异常: {e}")
 
@@ -612,12 +1281,17 @@ def send_telegram_message(text: str) -> bool:
         }
 
         try:
-            resp = requests.post(url, json=payload_plain, timeout=30)
+            resp = post(payload_plain)
             if resp.status_code == 200:
                 logger.info(f"消息 {i}/{len(messages)} (纯文本) 发送成功")
+                if on_part_sent:
+                    on_part_sent(i)
             else:
                 logger.error(f"消息 {i} 彻底失败: {resp.text}")
                 all_success = False
+        except DeliveryUncertainError as e:
+            logger.error(f"消息 {i} 可能已送达但未确认，不再重发: {e}")
+            all_success = False
         except Exception as e:
             logger.error(f"消息 {i} 纯文本重发异常: {e}")
             all_success = False
@@ -645,6 +1319,9 @@ def send_email(subject: str, content: str) -> bool:
         logger.warning("邮件配置不完整，跳过邮件发送")
         return False
 
+    import smtplib
+    from email.mime.text import MIMEText
+
     # 支持多个收件人（逗号分隔）
     receivers = [r.strip() for r in EMAIL_RECEIVER.split(",") if r.strip()]
     logger.info(f"正在发送邮件到 {len(receivers)} 个收件人: {', '.join(receivers)}...")
@@ -703,29 +1380,48 @@ def send_email(subject: str, content: str) -> bool:
         msg["To"] = ", ".join(receivers)
 
         # 发送邮件
-        if SMTP_PORT == 465:
-            # SSL 连接
-            with smtplib.SMTP_SSL(SMTP_SERVER, SMTP_PORT, timeout=30) as server:
+        def deliver(timeout: float) -> dict:
+            # 连接、STARTTLS、登录阶段的失败都发生在邮件发出之前，可以重试
+            if SMTP_PORT == 465:
+                # SSL 连接
+                server = smtplib.SMTP_SSL(SMTP_SERVER, SMTP_PORT, timeout=timeout)
+            else:
+                # TLS 连接
+                server = smtplib.SMTP(SMTP_SERVER, SMTP_PORT, timeout=timeout)
+
+            try:
+                if SMTP_PORT != 465:
+                    server.starttls()
                 server.login(EMAIL_SENDER, EMAIL_PASSWORD)
-                result = server.sendmail(EMAIL_SENDER, receivers, msg.as_string())
-                if result:
-                    logger.warning(f"部分收件人发送失败: {result}")
-                else:
-                    logger.info(f"邮件成功发送到所有 {len(receivers)} 个收件人")
+
+                try:
+                    refused = server.sendmail(EMAIL_SENDER, receivers, msg.as_string())
+                except (smtplib.SMTPSenderRefused, smtplib.SMTPRecipientsRefused):
+                    # 发件人 / 收件人在 DATA 之前被拒绝，邮件没有发出
+                    raise
+                except (smtplib.SMTPException, OSError) as e:
+                    # DATA 阶段的断连、超时或错误响应: 邮件可能已被接收
+                    raise DeliveryUncertainError(f"邮件已发出但未收到确认: {e}") from e
+            finally:
+                # QUIT 失败不影响已完成的投递，也不能触发重发
+                try:
+                    server.quit()
+                except (smtplib.SMTPException, OSError):
+                    server.close()
+
+            return refused
+
+        result = call_with_resilience("smtp", deliver)
+        if result:
+            logger.warning(f"部分收件人发送失败: {result}")
         else:
-            # TLS 连接
-            with smtplib.SMTP(SMTP_SERVER, SMTP_PORT, timeout=30) as server:
-                server.starttls()
-                server.login(EMAIL_SENDER, EMAIL_PASSWORD)
-                result = server.sendmail(EMAIL_SENDER, receivers, msg.as_string())
-                if result:
-                    logger.warning(f"部分收件人发送失败: {result}")
-                else:
-                    logger.info(f"邮件成功发送到所有 {len(receivers)} 个收件人")
+            logger.info(f"邮件成功发送到所有 {len(receivers)} 个收件人")
 
         logger.info("邮件发送成功")
         return True
 
+    except DeliveryUncertainError as e:
+        logger.error(f"邮件可能已发送，为避免重复不再重发: {e}")
     except smtplib.SMTPAuthenticationError:
         logger.error("邮件发送失败: SMTP 认证错误，请检查用户名和密码")
     except smtplib.SMTPConnectError:
@@ -736,6 +1432,480 @@ def send_email(subject: str, content: str) -> bool:
     return False
 
 
+# ============================================================
+# 归档与全文检索
+# ============================================================
+
+ARCHIVE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS digests (
+    run_id TEXT PRIMARY KEY,
+    run_date TEXT NOT NULL,
+    provider TEXT,
+    language TEXT,
+    summary TEXT
+);
+CREATE TABLE IF NOT EXISTS articles (
+    id INTEGER PRIMARY KEY,
+    run_id TEXT NOT NULL,
+    run_date TEXT NOT NULL,
+    article_id TEXT NOT NULL,
+    title TEXT,
+    link TEXT,
+    source TEXT,
+    published TEXT,
+    abstract TEXT,
+    UNIQUE (run_id, article_id)
+);
+CREATE INDEX IF NOT EXISTS idx_articles_run_date ON articles (run_date);
+CREATE INDEX IF NOT EXISTS idx_digests_run_date ON digests (run_date);
+CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5 (
+    title, abstract, content='articles', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS articles_ai AFTER INSERT ON articles BEGIN
+    INSERT INTO articles_fts (rowid, title, abstract) VALUES (new.id, new.title, new.abstract);
+END;
+CREATE VIRTUAL TABLE IF NOT EXISTS digests_fts USING fts5 (
+    summary, content='digests', content_rowid='rowid', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS digests_ai AFTER INSERT ON digests BEGIN
+    INSERT INTO digests_fts (rowid, summary) VALUES (new.rowid, new.summary);
+END;
+CREATE TABLE IF NOT EXISTS rollups (
+    period TEXT NOT NULL,
+    start_date TEXT NOT NULL,
+    end_date TEXT NOT NULL,
+    language TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    delivered INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (period, start_date, end_date, language)
+);
+CREATE TABLE IF NOT EXISTS rollup_sent (
+    period TEXT NOT NULL,
+    start_date TEXT NOT NULL,
+    end_date TEXT NOT NULL,
+    language TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    part INTEGER NOT NULL,
+    PRIMARY KEY (period, start_date, end_date, language, channel, part)
+);
+"""
+
+
+def open_archive():
+    """
+    打开归档数据库，必要时创建表结构。
+
+    文献表使用 porter 分词 (英文词形归并)，日报表使用 trigram 分词，
+    以便检索没有空格分词的中文总结。
+
+    Returns:
+        sqlite3.Connection
+    """
+    import sqlite3
+
+    conn = sqlite3.connect(ARCHIVE_DB)
+    conn.executescript(ARCHIVE_SCHEMA)
+    return conn
+
+
+def archive_digest(run_id: str, articles: list, summary: Optional[str]) -> None:
+    """
+    将一期日报的文献和 AI 总结追加到归档。同一 run_id 重复写入会被忽略，
+    因此断点续跑时可以安全地再次调用。
+
+    Args:
+        run_id: 运行 ID (ISO 格式时间)
+        articles: 本期送入 AI 的文章列表
+        summary: AI 生成的总结，AI 失败时为 None
+    """
+    import sqlite3
+
+    run_date = run_id[:10]
+    try:
+        conn = open_archive()
+        with conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO digests (run_id, run_date, provider, language, summary) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (run_id, run_date, AI_PROVIDER, SUMMARY_LANGUAGE, summary),
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO articles "
+                "(run_id, run_date, article_id, title, link, source, published, abstract) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        run_id, run_date, a["id"], a.get("title", ""), a.get("link", ""),
+                        a.get("source", ""), a.get("published", ""), a.get("summary", ""),
+                    )
+                    for a in articles
+                ],
+            )
+        conn.close()
+        logger.info(f"已归档 {len(articles)} 篇文章到 {ARCHIVE_DB}")
+    except sqlite3.Error as e:
+        logger.error(f"归档失败: {e}")
+
+
+def build_fts_query(query: str) -> str:
+    """
+    把用户输入转换为 FTS5 查询：每个词加引号后按 AND 组合，
+    避免 "-"、":" 等字符被当作 FTS5 语法。
+
+    Args:
+        query: 用户输入的检索词
+
+    Returns:
+        FTS5 MATCH 表达式
+    """
+    terms = [t.replace('"', '""') for t in query.split()]
+    return " ".join(f'"{t}"' for t in terms)
+
+
+def search_archive(
+    query: str,
+    since: str = "",
+    until: str = "",
+    limit: int = 20,
+    digests: bool = False,
+) -> list:
+    """
+    在归档中全文检索文献或日报。
+
+    Args:
+        query: 检索词 (多个词之间为 AND 关系)
+        since: 起始日期 YYYY-MM-DD (含，可选)
+        until: 截止日期 YYYY-MM-DD (含，可选)
+        limit: 最多返回条数
+        digests: True 时检索 AI 日报正文，否则检索文献标题和摘要
+
+    Returns:
+        结果字典列表，按相关度排序
+    """
+    if digests:
+        sql = (
+            "SELECT d.run_date, snippet(digests_fts, 0, '[', ']', '...', 16) "
+            "FROM digests_fts JOIN digests d ON d.rowid = digests_fts.rowid "
+            "WHERE digests_fts MATCH ? AND d.run_date >= ? AND d.run_date <= ? "
+            "ORDER BY bm25(digests_fts) LIMIT ?"
+        )
+    else:
+        sql = (
+            "SELECT a.run_date, a.title, a.link, a.source "
+            "FROM articles_fts JOIN articles a ON a.id = articles_fts.rowid "
+            "WHERE articles_fts MATCH ? AND a.run_date >= ? AND a.run_date <= ? "
+            "ORDER BY bm25(articles_fts, 2.0, 1.0) LIMIT ?"
+        )
+
+    conn = open_archive()
+    try:
+        rows = conn.execute(
+            sql, (build_fts_query(query), since or "0000-00-00", until or "9999-99-99", limit)
+        ).fetchall()
+    finally:
+        conn.close()
+
+    if digests:
+        return [{"run_date": r[0], "snippet": r[1]} for r in rows]
+    return [{"run_date": r[0], "title": r[1], "link": r[2], "source": r[3]} for r in rows]
+
+
+def search_main(args) -> None:
+    """命令行检索入口：打印归档中的匹配结果"""
+    if not os.path.exists(ARCHIVE_DB):
+        print(f"归档数据库不存在: {ARCHIVE_DB}")
+        return
+
+    start = time.perf_counter()
+    results = search_archive(
+        " ".join(args.query), args.since, args.until, args.limit, args.digests
+    )
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    for r in results:
+        if args.digests:
+            print(f"{r['run_date']}  {r['snippet']}")
+        else:
+            print(f"{r['run_date']}  [{r['source']}] {r['title']}\n            {r['link']}")
+    print(f"\n共 {len(results)} 条结果 ({elapsed_ms:.1f} ms)")
+
+
+# ============================================================
+# 周报 / 月报 (基于已归档的每日总结逐级合并)
+# ============================================================
+
+def get_rollup_window(period: str, ref_date: date) -> tuple:
+    """
+    计算参考日期之前最近一个完整周期的起止日期。
+
+    Args:
+        period: weekly (上一个周一至周日) 或 monthly (上一个自然月)
+        ref_date: 参考日期
+
+    Returns:
+        (起始日期, 截止日期)，均包含在内
+    """
+    if period == "weekly":
+        end = ref_date - timedelta(days=ref_date.weekday() + 1)
+        return end - timedelta(days=6), end
+
+    end = ref_date.replace(day=1) - timedelta(days=1)
+    return end.replace(day=1), end
+
+
+def load_daily_summaries(conn, start: date, end: date) -> list:
+    """
+    读取时间范围内当前语言的每日 AI 总结。
+
+    Returns:
+        (日期字符串, 总结) 列表，按日期排序
+    """
+    return conn.execute(
+        "SELECT run_date, summary FROM digests "
+        "WHERE run_date >= ? AND run_date <= ? AND language = ? AND summary IS NOT NULL "
+        "ORDER BY run_id",
+        (start.isoformat(), end.isoformat(), SUMMARY_LANGUAGE),
+    ).fetchall()
+
+
+def load_rollup(conn, period: str, start: date, end: date) -> Optional[tuple]:
+    """
+    读取已生成的周期总结。
+
+    Returns:
+        (总结, 是否已推送)，不存在时返回 None
+    """
+    return conn.execute(
+        "SELECT summary, delivered FROM rollups "
+        "WHERE period = ? AND start_date = ? AND end_date = ? AND language = ?",
+        (period, start.isoformat(), end.isoformat(), SUMMARY_LANGUAGE),
+    ).fetchone()
+
+
+def save_rollup(conn, period: str, start: date, end: date, summary: str, delivered: bool = False) -> None:
+    """写入 (或覆盖) 周期总结"""
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO rollups (period, start_date, end_date, language, summary, delivered) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (period, start.isoformat(), end.isoformat(), SUMMARY_LANGUAGE, summary, int(delivered)),
+        )
+
+
+def load_rollup_sent(conn, period: str, start: date, end: date, channel: str) -> set:
+    """
+    读取周期总结在某个渠道已送达的分段编号 (邮件整体记为分段 0)。
+
+    Returns:
+        已送达的分段编号集合
+    """
+    rows = conn.execute(
+        "SELECT part FROM rollup_sent "
+        "WHERE period = ? AND start_date = ? AND end_date = ? AND language = ? AND channel = ?",
+        (period, start.isoformat(), end.isoformat(), SUMMARY_LANGUAGE, channel),
+    ).fetchall()
+    return {r[0] for r in rows}
+
+
+def mark_rollup_sent(conn, period: str, start: date, end: date, channel: str, part: int) -> None:
+    """记录周期总结在某个渠道的一个分段已送达，断点续跑时不再重发"""
+    with conn:
+        conn.execute(
+            "INSERT OR IGNORE INTO rollup_sent (period, start_date, end_date, language, channel, part) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (period, start.isoformat(), end.isoformat(), SUMMARY_LANGUAGE, channel, part),
+        )
+
+
+def build_rollup_prompt(period: str, start: date, end: date, items: list) -> str:
+    """
+    构建合并多条已有总结的 Prompt。
+
+    Args:
+        period: weekly 或 monthly
+        start: 起始日期
+        end: 截止日期
+        items: (标签, 总结) 列表，标签为日期或日期范围
+
+    Returns:
+        格式化的 Prompt 字符串
+    """
+    items_text = ""
+    for label, summary in items:
+        items_text += f"\n--- {label} ---\n{summary[:ROLLUP_ITEM_CHARS]}\n"
+
+    date_range = f"{start.isoformat()} ~ {end.isoformat()}"
+
+    if SUMMARY_LANGUAGE == "EN":
+        title = "Rheumatology Literature Weekly" if period == "weekly" else "Rheumatology Literature Monthly"
+        prompt = f"""You are a pediatric rheumatology expert. Below are the digests already published for "Juvenile Dermatomyositis (JDM)" during {date_range}. Merge them into a single overview.
+
+Requirements:
+1. Start DIRECTLY with the title "{title} | {date_range}" - NO greetings or introductions
+2. Open with 2-3 sentences on the most important developments of the period
+3. Then categorize into [Breaking News], [Clinical], and [Basic Research]; merge duplicates and keep only the most noteworthy entries
+4. Each entry: English title, a one-sentence plain-language summary, and the original link copied from the digests
+5. CRITICAL: Do NOT use Markdown headers (###, ##). Use plain text with emojis (🔥, 🏥, 🔬) for categories
+6. Only use information contained in the digests below
+
+Digests to merge:
+{items_text}
+"""
+    else:
+        title = "风湿免疫科文献周报" if period == "weekly" else "风湿免疫科文献月报"
+        prompt = f"""你是一个风湿免疫科专家。以下是 {date_range} 期间已发布的"幼年皮肌炎"文献日报，请将它们合并为一份综述。
+
+要求：
+1. 直接以标题开始："{title} | {date_range}"，不要任何问候语或前缀
+2. 先用 2-3 句话概括本期最重要的进展
+3. 再分为【重磅】、【临床】、【基础】三类，合并重复条目，只保留最值得关注的内容
+4. 每个条目包含：中文标题、一句话通俗解读、原文链接 (从日报中原样复制)
+5. 关键：不要使用 Markdown 标题符号（###、##），使用纯文本加 emoji（🔥、🏥、🔬）来标记分类
+6. 只使用下方日报中已有的信息
+
+待合并日报：
+{items_text}
+"""
+
+    return prompt
+
+
+def merge_summaries(period: str, start: date, end: date, items: list) -> Optional[str]:
+    """
+    逐级合并多条总结：超过 ROLLUP_BATCH_SIZE 条时先分批合并，再合并各批结果，
+    保证每次 AI 调用的输入都很小。即使只有一条输入也会经过最后一轮合并，
+    以便按周报 / 月报的标题和格式重写。
+
+    Args:
+        period: weekly 或 monthly
+        start: 起始日期
+        end: 截止日期
+        items: (标签, 总结) 列表
+
+    Returns:
+        合并后的总结，失败返回 None
+    """
+    batch_size = max(ROLLUP_BATCH_SIZE, 2)
+    while len(items) > batch_size:
+        merged = []
+        for i in range(0, len(items), batch_size):
+            batch = items[i:i + batch_size]
+            label = f"{batch[0][0].split(' ~ ')[0]} ~ {batch[-1][0].split(' ~ ')[-1]}"
+            if len(batch) == 1:
+                merged.append(batch[0])
+                continue
+            logger.info(f"正在合并 {label} 的 {len(batch)} 条总结...")
+            summary = generate_text(build_rollup_prompt(period, start, end, batch))
+            if not summary:
+                return None
+            merged.append((label, summary))
+        items = merged
+
+    logger.info(f"正在生成 {start} ~ {end} 的{'周报' if period == 'weekly' else '月报'}...")
+    return generate_text(build_rollup_prompt(period, start, end, items))
+
+
+def build_weekly_rollup(conn, start: date, end: date) -> Optional[str]:
+    """
+    获取或生成一周 (或月份边界处的部分周) 的总结，已生成的直接复用。
+
+    Returns:
+        周总结，该范围内没有日报或生成失败时返回 None
+    """
+    cached = load_rollup(conn, "weekly", start, end)
+    if cached:
+        logger.info(f"复用已生成的周总结: {start} ~ {end}")
+        return cached[0]
+
+    dailies = load_daily_summaries(conn, start, end)
+    if not dailies:
+        return None
+
+    summary = merge_summaries("weekly", start, end, dailies)
+    if summary:
+        save_rollup(conn, "weekly", start, end, summary)
+    return summary
+
+
+def build_monthly_rollup(conn, start: date, end: date) -> Optional[str]:
+    """
+    按周分段复用/生成周总结，再合并为月总结。
+
+    Returns:
+        月总结，该月没有日报或生成失败时返回 None
+    """
+    weeklies = []
+    week_start = start
+    while week_start <= end:
+        week_end = min(week_start + timedelta(days=6 - week_start.weekday()), end)
+        summary = build_weekly_rollup(conn, week_start, week_end)
+        if summary:
+            weeklies.append((f"{week_start.isoformat()} ~ {week_end.isoformat()}", summary))
+        week_start = week_end + timedelta(days=1)
+
+    if not weeklies:
+        return None
+
+    return merge_summaries("monthly", start, end, weeklies)
+
+
+def rollup_main(args) -> None:
+    """命令行周报 / 月报入口：生成 (或复用) 周期总结并推送"""
+    period = args.period
+    ref_date = date.fromisoformat(args.date) if args.date else date.today()
+    start, end = get_rollup_window(period, ref_date)
+    label = "周报" if period == "weekly" else "月报"
+    logger.info(f"开始生成{label}: {start} ~ {end}")
+
+    conn = open_archive()
+    try:
+        cached = load_rollup(conn, period, start, end)
+        if cached and cached[1]:
+            logger.info(f"{label}已推送过，任务结束")
+            return
+
+        if cached:
+            summary = cached[0]
+        elif period == "weekly":
+            summary = build_weekly_rollup(conn, start, end)
+        else:
+            summary = build_monthly_rollup(conn, start, end)
+            if summary:
+                save_rollup(conn, period, start, end, summary)
+
+        if not summary:
+            logger.info(f"{start} ~ {end} 没有可用的日报总结，任务结束")
+            return
+
+        # 逐段记录 Telegram 送达情况，中途中断后重跑只发送缺失的分段
+        telegram_ok = send_telegram_message(
+            summary,
+            sent_parts=load_rollup_sent(conn, period, start, end, "telegram"),
+            on_part_sent=lambda part: mark_rollup_sent(conn, period, start, end, "telegram", part),
+        )
+
+        email_ok = bool(load_rollup_sent(conn, period, start, end, "email"))
+        if not email_ok:
+            if SUMMARY_LANGUAGE == "EN":
+                kind = "Weekly" if period == "weekly" else "Monthly"
+                email_subject = f"{kind} Literature Digest - {start.isoformat()} ~ {end.isoformat()}"
+            else:
+                email_subject = f"{label}文献综述 - {start.isoformat()} ~ {end.isoformat()}"
+            email_ok = send_email(email_subject, summary)
+            if email_ok:
+                mark_rollup_sent(conn, period, start, end, "email", 0)
+
+        # 只有至少一个渠道送达成功才标记为已推送，否则下次运行会重试
+        if telegram_ok or email_ok:
+            save_rollup(conn, period, start, end, summary, delivered=True)
+            logger.info(f"{label}任务完成")
+        else:
+            save_rollup(conn, period, start, end, summary)
+            logger.error(f"{label}所有渠道均推送失败，下次运行将重试")
+    finally:
+        conn.close()
+
+
 # ============================================================
 # 主流程
 # ============================================================
@@ -748,49 +1918,163 @@ def main():
     logger.info(f"输出语言: {SUMMARY_LANGUAGE}")
     logger.info("=" * 50)
 
-    # 1. 加载历史记录
+    # 1. 加载历史记录与 RSS 缓存验证信息
     history = load_history()
+    journal = load_run_journal()
 
-    # 2. 获取 RSS 文章
-    all_articles = fetch_rss_articles(RSS_SOURCES)
-
-    # 3. 过滤新文章
-    new_articles = filter_new_articles(all_articles, history)
-
-    if not new_articles:
-        logger.info("没有新文章，任务结束")
-        return
-
-    # 4. AI 总结
-    summary = generate_ai_summary(new_articles)
+    if journal:
+        # 上次运行中断: 跳过获取阶段，从检查点继续
+        logger.info(
+            f"发现未完成的运行 ({journal.get('run_id')}, 阶段: {journal.get('stage')})，从断点继续"
+        )
+        new_articles = journal["new_articles"]
+        selected_articles = journal.get("selected_articles", new_articles)
+        deferred_ids = set(journal.get("deferred_ids", []))
+        feed_state = journal.get("feed_state") or load_feed_state()
+    else:
+        feed_state = load_feed_state()
+
+        # 2. 获取 RSS 文章 (条件请求，未更新的源直接跳过)
+        all_articles = fetch_rss_articles(RSS_SOURCES, feed_state)
+
+        # 3. 过滤新文章
+        new_articles = filter_new_articles(all_articles, history)
+
+        # 快速路径: 此时尚未导入任何 AI / 推送相关的 SDK
+        if not new_articles:
+            save_feed_state(feed_state)
+            logger.info("没有新文章，任务结束")
+            return
+
+        # 4. 相关性预筛选: 离题文章直接记入历史，不送入 AI；
+        #    超出每期上限的相关文章不记入历史，留到下次运行
+        selected_articles, deferred_articles = rank_articles(new_articles)
+        deferred_ids = {a["id"] for a in deferred_articles}
+
+        if not selected_articles:
+            for a in new_articles:
+                history.add(a["id"])
+            save_history(history)
+            save_feed_state(feed_state)
+            logger.info("没有相关的新文章，任务结束")
+            return
+
+        journal = {
+            "run_id": datetime.now().strftime("%Y-%m-%dT%H:%M:%S"),
+            "stage": "fetched",
+            "new_articles": new_articles,
+            "selected_articles": selected_articles,
+            "deferred_ids": sorted(deferred_ids),
+            "feed_state": feed_state,
+            "delivered": {"telegram": [], "email": False},
+        }
+        save_run_journal(journal)
 
-    # 5. 推送消息
-    if summary:
-        # 5.1 发送到 Telegram
-        send_telegram_message(summary)
+    # 5. AI 总结 (检查点中已有结果时不再重复调用)
+    if journal["stage"] == "fetched":
+        summary = generate_ai_summary(selected_articles)
 
-        # 5.2 发送邮件 (如果配置了)
+        if summary:
+            journal["message"] = summary
+            journal["fallback"] = False
+        else:
+            # AI 失败时的备选方案
+            if SUMMARY_LANGUAGE == "EN":
+                fallback = f"📅 {datetime.now().strftime('%Y-%m-%d')} New Literature Alert (AI generation failed)\n\n"
+            else:
+                fallback = f"📅 {datetime.now().strftime('%Y-%m-%d')} 新文献通知 (AI 生成失败)\n\n"
+            fallback += "\n".join([f"• {a['title']}\n  {a['link']}" for a in selected_articles[:5]])
+            journal["message"] = fallback
+            journal["fallback"] = True
+
+        journal["stage"] = "summarized"
+        save_run_journal(journal)
+
+    # 6. 推送消息 (逐渠道、逐分段记录，已送达的部分不再重发)
+    delivered = journal["delivered"]
+
+    def mark_telegram_part(part: int) -> None:
+        delivered["telegram"].append(part)
+        save_run_journal(journal)
+
+    # 6.1 发送到 Telegram
+    send_telegram_message(
+        journal["message"],
+        sent_parts=set(delivered["telegram"]),
+        on_part_sent=mark_telegram_part,
+    )
+
+    # 6.2 发送邮件 (如果配置了，AI 失败时不发送)
+    if not journal["fallback"] and not delivered["email"]:
         if SUMMARY_LANGUAGE == "EN":
             email_subject = f"Daily Literature Digest - {datetime.now().strftime('%Y-%m-%d')}"
         else:
             email_subject = f"每日文献摘要 - {datetime.now().strftime('%Y-%m-%d')}"
-        send_email(email_subject, summary)
-    else:
-        # AI 失败时的备选方案
-        if SUMMARY_LANGUAGE == "EN":
-            fallback = f"📅 {datetime.now().strftime('%Y-%m-%d')} New Literature Alert (AI generation failed)\n\n"
-        else:
-            fallback = f"📅 {datetime.now().strftime('%Y-%m-%d')} 新文献通知 (AI 生成失败)\n\n"
-        fallback += "\n".join([f"• {a['title']}\n  {a['link']}" for a in new_articles[:5]])
-        send_telegram_message(fallback)
+        # 记录实际结果：发送失败时续跑会再尝试一次
+        delivered["email"] = send_email(email_subject, journal["message"])
+        save_run_journal(journal)
+
+    journal["stage"] = "delivered"
+    save_run_journal(journal)
 
-    # 6. 保存历史记录
+    # 7. 归档本期文献与总结，供日后检索
+    archive_digest(
+        journal["run_id"],
+        selected_articles,
+        None if journal["fallback"] else journal["message"],
+    )
+
+    # 8. 保存历史记录 (包括被预筛选丢弃的文章，不包括顺延到下次的文章)
     for a in new_articles:
-        history.add(a["id"])
+        if a["id"] not in deferred_ids:
+            history.add(a["id"])
     save_history(history)
+    # 有顺延文章时保留旧的缓存验证信息，确保下次运行完整获取而不是命中 304
+    if not deferred_ids:
+        save_feed_state(feed_state)
+    clear_run_journal()
 
     logger.info("任务完成")
 
 
+def cli(argv: Optional[list] = None) -> None:
+    """
+    命令行入口。
+
+    用法:
+        python main.py                          运行每日任务
+        python main.py search JAK inhibitor     检索归档文献
+        python main.py search 钙质沉着 --digests --since 2026-07-01
+        python main.py rollup weekly            生成并推送上周周报
+        python main.py rollup monthly           生成并推送上月月报
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(description="医疗情报自动收集与推送机器人")
+    subparsers = parser.add_subparsers(dest="command")
+
+    search_parser = subparsers.add_parser("search", help="全文检索本地归档")
+    search_parser.add_argument("query", nargs="+", help="检索词，多个词之间为 AND 关系")
+    search_parser.add_argument("--since", default="", help="起始日期 YYYY-MM-DD")
+    search_parser.add_argument("--until", default="", help="截止日期 YYYY-MM-DD")
+    search_parser.add_argument("--limit", type=int, default=20, help="最多返回条数 (默认 20)")
+    search_parser.add_argument("--digests", action="store_true", help="检索 AI 日报正文而非文献")
+
+    rollup_parser = subparsers.add_parser("rollup", help="基于已归档的日报生成周报 / 月报")
+    rollup_parser.add_argument("period", choices=["weekly", "monthly"], help="周期")
+    rollup_parser.add_argument(
+        "--date", default="", help="参考日期 YYYY-MM-DD，汇总其之前的完整周期 (默认今天)"
+    )
+
+    args = parser.parse_args(argv)
+
+    if args.command == "search":
+        search_main(args)
+    elif args.command == "rollup":
+        rollup_main(args)
+    else:
+        main()
+
+
 if __name__ == "__main__":
-    main()
+    cli()
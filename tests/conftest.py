@@ -0,0 +1,22 @@
+"""
+测试公共配置：把仓库根目录加入 sys.path，并让每个测试在独立的临时目录中运行，
+避免读写仓库中的 history.json 等状态文件。
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def isolated_state(tmp_path, monkeypatch):
+    """在临时目录中运行，并清空进程内缓存的熔断状态"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(main, "_circuit_state", None)
+    monkeypatch.setattr(main, "RETRY_BASE_DELAY", 0.0)
+    yield
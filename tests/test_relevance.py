@@ -0,0 +1,55 @@
+"""
+相关性预筛选测试：关键词配置解析、阈值过滤与超出上限的文章顺延。
+"""
+
+import json
+
+import main
+
+
+def article(article_id, title, summary=""):
+    return {"id": article_id, "title": title, "link": "", "summary": summary, "source": "PubMed", "published": ""}
+
+
+def test_invalid_keyword_items_ignored(monkeypatch):
+    monkeypatch.setattr(main, "RELEVANCE_KEYWORDS", "dermatomyositis:3,, :2,zero:0,neg:-1,bad:x,myositis")
+
+    assert main.load_relevance_keywords() == {"dermatomyositis": 3.0, "myositis": 1.0}
+
+
+def test_trailing_comma_does_not_pass_everything(monkeypatch):
+    monkeypatch.setattr(main, "RELEVANCE_KEYWORDS", "dermatomyositis:3,")
+
+    selected, deferred = main.rank_articles([article("a", "Cooking recipes", "pasta")])
+
+    assert selected == [] and deferred == []
+
+
+def test_rank_and_defer_over_cap(monkeypatch):
+    monkeypatch.setattr(main, "MAX_ARTICLES_PER_DIGEST", 2)
+    articles = [
+        article("off", "Knee surgery outcomes"),
+        article("low", "Myositis registry"),
+        article("high", "MDA5 antibodies in juvenile dermatomyositis"),
+        article("mid", "Dermatomyositis calcinosis"),
+    ]
+
+    selected, deferred = main.rank_articles(articles)
+
+    assert [a["id"] for a in selected] == ["high", "mid"]
+    assert [a["id"] for a in deferred] == ["low"]
+
+
+def test_deferred_articles_kept_out_of_history(monkeypatch):
+    articles = [article(f"jdm{i}", "Juvenile dermatomyositis cohort") for i in range(3)]
+    articles.append(article("off", "Cooking recipes"))
+    monkeypatch.setattr(main, "MAX_ARTICLES_PER_DIGEST", 2)
+    monkeypatch.setattr(main, "fetch_rss_articles", lambda sources, feed_state=None: articles)
+    monkeypatch.setattr(main, "generate_ai_summary", lambda selected: "digest")
+    monkeypatch.setattr(main, "send_telegram_message", lambda *args, **kwargs: True)
+    monkeypatch.setattr(main, "send_email", lambda subject, content: True)
+
+    main.main()
+
+    history = set(json.load(open(main.HISTORY_FILE, encoding="utf-8")))
+    assert history == {"jdm0", "jdm1", "off"}
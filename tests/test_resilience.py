@@ -0,0 +1,125 @@
+"""
+容错层测试：熔断的打开、半开探测与恢复，时间预算，以及重试分类。
+"""
+
+import json
+import smtplib
+
+import pytest
+
+import main
+
+
+class Transient(OSError):
+    """模拟网络故障"""
+
+
+def failing(calls):
+    def func(timeout):
+        calls.append(timeout)
+        raise Transient("connection reset")
+    return func
+
+
+def circuit_on_disk(endpoint):
+    with open(main.CIRCUIT_STATE_FILE, encoding="utf-8") as f:
+        return json.load(f).get(endpoint)
+
+
+def test_retries_then_opens_circuit():
+    calls = []
+    for _ in range(main.CIRCUIT_FAILURE_THRESHOLD):
+        with pytest.raises(Transient):
+            main.call_with_resilience("telegram", failing(calls))
+
+    assert len(calls) == main.CIRCUIT_FAILURE_THRESHOLD * main.RETRY_MAX_ATTEMPTS
+    assert circuit_on_disk("telegram")["failures"] == main.CIRCUIT_FAILURE_THRESHOLD
+
+    # 熔断后直接拒绝，不再发起调用
+    with pytest.raises(main.CircuitOpenError):
+        main.call_with_resilience("telegram", failing(calls))
+    assert len(calls) == main.CIRCUIT_FAILURE_THRESHOLD * main.RETRY_MAX_ATTEMPTS
+
+
+def open_circuit(endpoint, opened_ago):
+    main.load_circuit_state()[endpoint] = {
+        "failures": main.CIRCUIT_FAILURE_THRESHOLD,
+        "opened_at": main.time.time() - opened_ago,
+    }
+
+
+def test_half_open_probe_success_resets_circuit():
+    open_circuit("smtp", main.CIRCUIT_COOLDOWN + 1)
+    timeouts = []
+
+    result = main.call_with_resilience("smtp", lambda timeout: timeouts.append(timeout) or "sent")
+
+    assert result == "sent"
+    assert timeouts == [main.CIRCUIT_PROBE_TIMEOUT]
+    assert circuit_on_disk("smtp") is None
+
+
+def test_half_open_probe_failure_reopens_without_retry():
+    open_circuit("smtp", main.CIRCUIT_COOLDOWN + 1)
+    calls = []
+
+    with pytest.raises(Transient):
+        main.call_with_resilience("smtp", failing(calls))
+
+    assert len(calls) == 1
+    with pytest.raises(main.CircuitOpenError):
+        main.call_with_resilience("smtp", failing(calls))
+
+
+def test_exhausted_deadline_does_not_touch_circuit(monkeypatch):
+    monkeypatch.setattr(main, "RUN_DEADLINE", 0)
+    calls = []
+
+    for _ in range(main.CIRCUIT_FAILURE_THRESHOLD):
+        with pytest.raises(main.DeadlineExceededError):
+            main.call_with_resilience("telegram", failing(calls))
+
+    assert calls == []
+    assert main.load_circuit_state() == {}
+
+
+def test_permanent_error_not_retried_or_counted():
+    calls = []
+
+    def refused(timeout):
+        calls.append(timeout)
+        raise smtplib.SMTPRecipientsRefused({"a@example.com": (550, b"no such user")})
+
+    with pytest.raises(smtplib.SMTPRecipientsRefused):
+        main.call_with_resilience("smtp", refused)
+
+    assert len(calls) == 1
+    assert main.load_circuit_state() == {}
+
+
+@pytest.mark.parametrize("exc, expected", [
+    (Transient("reset"), True),
+    (TimeoutError(), True),
+    (smtplib.SMTPServerDisconnected(), True),
+    (smtplib.SMTPRecipientsRefused({"a@example.com": (451, b"later")}), True),
+    (smtplib.SMTPRecipientsRefused({"a@example.com": (550, b"no")}), False),
+    (smtplib.SMTPAuthenticationError(535, b"bad credentials"), False),
+    (TypeError("bad argument"), False),
+    (ValueError("bad value"), False),
+    (main.DeliveryUncertainError("maybe sent"), False),
+])
+def test_is_retryable(exc, expected):
+    assert main.is_retryable(exc) is expected
+
+
+def test_llm_read_timeout_not_retried():
+    calls = []
+
+    def read_timeout(timeout):
+        calls.append(timeout)
+        raise TimeoutError("read timed out")
+
+    with pytest.raises(main.DeliveryUncertainError):
+        main.call_llm_with_resilience("llm:deepseek", read_timeout)
+
+    assert len(calls) == 1
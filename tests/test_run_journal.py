@@ -0,0 +1,94 @@
+"""
+运行检查点测试：中断后续跑不重复调用 AI、不重发已送达的分段，完成后删除检查点。
+"""
+
+import json
+import os
+
+import pytest
+import requests
+
+import main
+
+ARTICLES = [
+    {
+        "id": f"pubmed:{i}",
+        "title": "Juvenile dermatomyositis cohort",
+        "link": f"https://pubmed.ncbi.nlm.nih.gov/{i}/",
+        "summary": "dermatomyositis",
+        "source": "PubMed",
+        "published": "",
+    }
+    for i in range(3)
+]
+
+# 约 10000 字符，切分为 3 段 Telegram 消息
+LONG_SUMMARY = "\n".join(f"line {i} " + "x" * 100 for i in range(100))
+
+
+class FakeResponse:
+    status_code = 200
+    text = "ok"
+
+
+@pytest.fixture
+def pipeline(monkeypatch):
+    """替换 RSS 获取、AI 生成和 Telegram 请求，记录调用情况"""
+    calls = {"llm": 0, "sent": [], "crash_after": None}
+
+    def fake_generate(articles):
+        calls["llm"] += 1
+        return LONG_SUMMARY
+
+    def fake_post(url, json=None, timeout=None):
+        if calls["crash_after"] is not None and len(calls["sent"]) >= calls["crash_after"]:
+            raise SystemExit("killed")
+        calls["sent"].append(json["text"].split("\n", 1)[0])
+        return FakeResponse()
+
+    monkeypatch.setattr(main, "TELEGRAM_BOT_TOKEN", "token")
+    monkeypatch.setattr(main, "TELEGRAM_CHAT_ID", "chat")
+    monkeypatch.setattr(main, "fetch_rss_articles", lambda sources, feed_state=None: ARTICLES)
+    monkeypatch.setattr(main, "generate_ai_summary", fake_generate)
+    monkeypatch.setattr(requests, "post", fake_post)
+    return calls
+
+
+def test_resume_skips_sent_parts_and_llm(pipeline):
+    pipeline["crash_after"] = 1
+    with pytest.raises(SystemExit):
+        main.main()
+
+    journal = json.load(open(main.RUN_JOURNAL_FILE, encoding="utf-8"))
+    assert journal["stage"] == "summarized"
+    assert journal["delivered"]["telegram"] == [1]
+
+    pipeline["crash_after"] = None
+    main.main()
+
+    assert pipeline["llm"] == 1
+    assert pipeline["sent"] == ["line 0 " + "x" * 100, "line 36 " + "x" * 100, "line 72 " + "x" * 100]
+    assert not os.path.exists(main.RUN_JOURNAL_FILE)
+    assert set(json.load(open(main.HISTORY_FILE, encoding="utf-8"))) == {a["id"] for a in ARTICLES}
+
+
+def test_email_result_recorded(pipeline, monkeypatch):
+    monkeypatch.setattr(main, "send_email", lambda subject, content: False)
+    saved = []
+    real_save = main.save_run_journal
+    monkeypatch.setattr(main, "save_run_journal", lambda j: (saved.append(json.loads(json.dumps(j))), real_save(j)))
+
+    main.main()
+
+    assert saved[-1]["stage"] == "delivered"
+    assert saved[-1]["delivered"]["email"] is False
+
+
+def test_malformed_journal_discarded(pipeline, monkeypatch):
+    with open(main.RUN_JOURNAL_FILE, "w", encoding="utf-8") as f:
+        json.dump({"new_articles": ARTICLES}, f)
+    monkeypatch.setattr(main, "fetch_rss_articles", lambda sources, feed_state=None: [])
+
+    main.main()
+
+    assert not os.path.exists(main.RUN_JOURNAL_FILE)
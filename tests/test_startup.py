@@ -0,0 +1,49 @@
+"""
+冷启动测试：用 `python -X importtime` 确认导入 main 时不会加载重量级 SDK。
+"""
+
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 这些库只能在对应阶段的函数内部按需导入
+HEAVY_MODULES = ["feedparser", "requests", "openai", "google.generativeai", "smtplib"]
+
+# 导入 main 的累计耗时上限 (微秒)
+IMPORT_BUDGET_US = 300_000
+
+
+def run_importtime() -> dict:
+    """在子进程中导入 main，返回 {模块名: 累计耗时(微秒)}"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=REPO_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        timings[name.strip()] = int(cumulative)
+    return timings
+
+
+def test_import_main_skips_heavy_sdks():
+    timings = run_importtime()
+    loaded = [
+        name for name in timings
+        for heavy in HEAVY_MODULES
+        if name == heavy or name.startswith(heavy + ".")
+    ]
+    assert not loaded, f"导入 main 时加载了重量级模块: {loaded}"
+
+
+def test_import_main_within_budget():
+    timings = run_importtime()
+    assert timings["main"] < IMPORT_BUDGET_US, f"导入 main 耗时 {timings['main']} us"